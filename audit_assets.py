@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+import config
+import utils
+
+# --- 离线资源审计 ---
+# 用法: python audit_assets.py [-o report.json] [--jobs N] [--strict]
+# 多进程并行解码 IMG_DIR 下的所有图片与 SND_DIR 下的所有声音，记录格式、尺寸、
+# 解码后大小与解码耗时，超出预算时以非零状态退出，可用于检查新提交的资源。
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+SOUND_EXTENSIONS = ('.wav', '.ogg', '.mp3', '.flac')
+
+# 文件头魔数 -> 实际格式
+MAGIC_NUMBERS = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF8", "gif"),
+    (b"BM", "bmp"),
+    (b"OggS", "ogg"),
+    (b"fLaC", "flac"),
+    (b"ID3", "mp3"),
+    (b"\xff\xfb", "mp3"),
+]
+# 扩展名 -> 期望格式
+EXTENSION_FORMATS = {
+    ".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".bmp": "bmp", ".gif": "gif",
+    ".webp": "webp", ".wav": "wav", ".ogg": "ogg", ".mp3": "mp3", ".flac": "flac",
+}
+
+def sniff_format(header):
+    """根据文件头判断实际格式"""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    for magic, name in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return name
+    return "unknown"
+
+def display_sizes():
+    """计算每类图片在游戏中的实际显示尺寸 {主题或文件名: (宽, 高)}"""
+    sizes = {}
+    for level in config.LEVELS:
+        card_size, _, _ = utils.card_layout(*level["grid"])
+        # 同一主题出现在多个关卡时取最大卡牌尺寸
+        current = sizes.get(level["theme"], (0, 0))
+        sizes[level["theme"]] = max(current, card_size)
+    sizes["card_back.png"] = max(sizes.values(), default=(0, 0))
+    sizes["background.png"] = (config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+    return sizes
+
+def complete_image_display_size(width, height):
+    """关卡完成图片的显示尺寸 (与 Game.load_level_assets 中的缩放规则一致)"""
+    scale = min(config.SCREEN_WIDTH / width, config.SCREEN_HEIGHT * 0.5 / height)
+    return int(width * scale), int(height * scale)
+
+def _init_worker():
+    """子进程初始化: 使用无设备的音频/视频驱动，只用于解码"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def audit_image(path):
+    """在子进程中解码一张图片并返回审计记录"""
+    record = {"path": path, "kind": "image", "issues": []}
+    with open(path, "rb") as f:
+        header = f.read(16)
+    record["format"] = sniff_format(header)
+    record["file_bytes"] = os.path.getsize(path)
+    try:
+        started = time.perf_counter()
+        image = pygame.image.load(path)
+        record["decode_ms"] = (time.perf_counter() - started) * 1000.0
+    except pygame.error as e:
+        record["issues"].append(f"corrupt: {e}")
+        return record
+    record["width"], record["height"] = image.get_size()
+    record["decoded_bytes"] = image.get_pitch() * image.get_height()
+    return record
+
+def audit_sound(path):
+    """在子进程中解码一个声音文件并返回审计记录"""
+    record = {"path": path, "kind": "sound", "issues": []}
+    with open(path, "rb") as f:
+        header = f.read(16)
+    record["format"] = sniff_format(header)
+    record["file_bytes"] = os.path.getsize(path)
+    try:
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        started = time.perf_counter()
+        sound = pygame.mixer.Sound(path)
+        record["decode_ms"] = (time.perf_counter() - started) * 1000.0
+    except pygame.error as e:
+        record["issues"].append(f"corrupt: {e}")
+        return record
+    record["duration_s"] = sound.get_length()
+    record["decoded_bytes"] = len(sound.get_raw())
+    return record
+
+def collect_files(root, extensions):
+    """递归收集指定扩展名的文件"""
+    found = []
+    if not os.path.isdir(root):
+        return found
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions):
+                found.append(os.path.join(dirpath, name))
+    return found
+
+def check_record(record, sizes):
+    """补充扩展名不符与尺寸过大的标记，以及单文件耗时预算"""
+    path = record["path"]
+    expected = EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower())
+    if record["format"] != expected:
+        record["issues"].append(f"mislabeled: 扩展名表示 {expected}，实际为 {record['format']}")
+
+    if record.get("decode_ms", 0) > config.AUDIT_MAX_DECODE_MS:
+        record["issues"].append(f"budget: 解码耗时 {record['decode_ms']:.1f}ms 超出 {config.AUDIT_MAX_DECODE_MS}ms")
+
+    if record["kind"] != "image" or "width" not in record:
+        return
+    relative = os.path.relpath(path, config.IMG_DIR)
+    name = os.path.basename(path)
+    if name.endswith("_complete.png"):
+        display = complete_image_display_size(record["width"], record["height"])
+    else:
+        display = sizes.get(name) or sizes.get(relative.split(os.sep)[0])
+    if not display:
+        return
+    record["display_width"], record["display_height"] = display
+    ratio = (record["width"] * record["height"]) / max(1, display[0] * display[1])
+    if ratio > config.AUDIT_OVERSIZE_FACTOR:
+        record["issues"].append(f"oversized: 像素数为显示尺寸 {display[0]}x{display[1]} 的 {ratio:.1f} 倍")
+
+def run_audit(jobs=None):
+    """并行审计所有资源，返回 (记录列表, 汇总)"""
+    images = collect_files(config.IMG_DIR, IMAGE_EXTENSIONS)
+    sounds = collect_files(config.SND_DIR, SOUND_EXTENSIONS)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+        records = list(executor.map(audit_image, images, chunksize=4))
+        records += list(executor.map(audit_sound, sounds))
+    wall_ms = (time.perf_counter() - started) * 1000.0
+
+    sizes = display_sizes()
+    for record in records:
+        check_record(record, sizes)
+
+    total_decode_ms = sum(r.get("decode_ms", 0) for r in records)
+    total_decoded_mb = sum(r.get("decoded_bytes", 0) for r in records) / (1024 * 1024)
+    budget_failures = []
+    if total_decode_ms > config.AUDIT_MAX_TOTAL_DECODE_MS:
+        budget_failures.append(f"解码耗时总和 {total_decode_ms:.0f}ms 超出 {config.AUDIT_MAX_TOTAL_DECODE_MS}ms")
+    if total_decoded_mb > config.AUDIT_MAX_DECODED_MB:
+        budget_failures.append(f"解码后总大小 {total_decoded_mb:.1f}MB 超出 {config.AUDIT_MAX_DECODED_MB}MB")
+
+    summary = {
+        "images": len(images),
+        "sounds": len(sounds),
+        "wall_ms": wall_ms,
+        "total_decode_ms": total_decode_ms,
+        "total_decoded_mb": total_decoded_mb,
+        "slowest": [r["path"] for r in sorted(records, key=lambda r: -r.get("decode_ms", 0))[:5]],
+        "budget_failures": budget_failures,
+    }
+    return records, summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="审计游戏图片与声音资源")
+    parser.add_argument("-o", "--output", help="JSON 报告输出路径 (默认输出到标准输出)")
+    parser.add_argument("--jobs", type=int, default=None, help="并行进程数 (默认等于 CPU 核数)")
+    parser.add_argument("--strict", action="store_true", help="扩展名不符或尺寸过大也视为失败")
+    args = parser.parse_args(argv)
+
+    records, summary = run_audit(args.jobs)
+    report = json.dumps({"summary": summary, "files": records}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+    failing_kinds = ("corrupt", "budget") + (("mislabeled", "oversized") if args.strict else ())
+    failed = [r for r in records if any(issue.startswith(failing_kinds) for issue in r["issues"])]
+    flagged = [r for r in records if r["issues"]]
+    print(f"已审计 {summary['images']} 张图片、{summary['sounds']} 个声音，"
+          f"{len(flagged)} 个文件有标记，耗时 {summary['wall_ms']:.0f}ms。", file=sys.stderr)
+    for reason in summary["budget_failures"]:
+        print(f"超出预算: {reason}", file=sys.stderr)
+    if failed or summary["budget_failures"]:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
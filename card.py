@@ -4,12 +4,15 @@ import utils
 
 # --- 卡牌类 ---
 class Card(pygame.sprite.Sprite):
-    def __init__(self, item_name, theme, card_size, image_path):
+    def __init__(self, item_name, theme, card_size, image_path, face_loader=None):
         super().__init__()
         self.item_name = item_name
         self.theme = theme
         self.card_size = card_size
         self.image_path = image_path # 存储原始相对路径或绝对路径
+        self.face_key = (image_path, tuple(card_size)) # 卡面在缓存/解码队列中的键
+        self.face_loader = face_loader # 为 None 时在首次需要卡面时同步加载
+        self._image_front = None # 卡面延迟加载，初始只需要卡背
         self.is_face_up = False
         self.is_matched = False
         self._load_images()
@@ -20,28 +23,33 @@ class Card(pygame.sprite.Sprite):
         self.flip_progress = 0 # 动画相关，当前版本未使用
 
     def _load_images(self):
-        """加载卡牌正面和背面图片"""
+        """加载卡牌背面图片 (正面在首次翻开时通过 image_front 加载)"""
         # 加载卡背
         try:
             # 假设 card_back.png 在 IMG_DIR 根目录
-            self.image_back_orig = utils.load_image("card_back.png")
-            self.image_back = pygame.transform.scale(self.image_back_orig, self.card_size)
+            self.image_back = utils.load_scaled_image("card_back.png", self.card_size)
         except Exception as e:
             print(f"无法加载卡背图片: {e}")
             self.image_back = pygame.Surface(self.card_size)
             self.image_back.fill(config.BLUE)
             pygame.draw.rect(self.image_back, config.WHITE, self.image_back.get_rect(), 2)
 
-        # 加载卡面 (节气图片)
-        try:
-            # image_path 已经是完整路径或相对于 IMG_DIR 的路径
-            self.image_front_orig = utils.load_image(self.image_path)
-            self.image_front = pygame.transform.scale(self.image_front_orig, self.card_size)
-        except Exception as e:
-            print(f"无法加载节气图片 {self.image_path}: {e}")
-            self.image_front = pygame.Surface(self.card_size)
-            self.image_front.fill(config.GREEN)
-            utils.draw_text(self.image_front, self.item_name, 16, self.card_size[0]//2, self.card_size[1]//2, config.BLACK, center=True)
+    @property
+    def image_front(self):
+        """卡面 (节气图片)，第一次访问时才取用，后台尚未解码完成时会等待"""
+        if self._image_front is None:
+            try:
+                # image_path 已经是完整路径或相对于 IMG_DIR 的路径
+                if self.face_loader:
+                    self._image_front = self.face_loader.get(self.image_path, self.card_size)
+                else:
+                    self._image_front = utils.load_scaled_image(self.image_path, self.card_size)
+            except Exception as e:
+                print(f"无法加载节气图片 {self.image_path}: {e}")
+                self._image_front = pygame.Surface(self.card_size)
+                self._image_front.fill(config.GREEN)
+                utils.draw_text(self._image_front, self.item_name, 16, self.card_size[0]//2, self.card_size[1]//2, config.BLACK, center=True)
+        return self._image_front
 
     def flip(self, instant=False,flag = True):
         """翻转卡牌"""
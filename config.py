@@ -50,3 +50,50 @@ THEME_NAMES = {
     "autumn": "秋",
     "winter": "冬"
 }
+
+# --- 特效设置 ---
+EFFECTS_ENABLED = True # 是否启用过渡/高亮特效 (需要 numpy)
+CROSSFADE_DURATION = 0.35 # 状态切换时的淡入淡出时长 (秒)
+MATCHED_DIM_FACTOR = 0.55 # 已匹配卡牌的亮度系数 (0~1)
+TIMER_WARNING_SECONDS = 10 # 剩余时间低于该值时开始闪烁警告
+TIMER_PULSE_HZ = 1.5 # 警告闪烁频率
+TIMER_PULSE_BAND = 48 # 警告闪烁边框宽度 (像素)
+EFFECTS_FRAME_BUDGET_MS = 10.0 # 特效每帧耗时预算 (毫秒)，超出后自动关闭特效
+
+# --- 资源审计预算 (audit_assets.py) ---
+AUDIT_MAX_DECODE_MS = 250 # 单个文件解码耗时上限 (毫秒)
+AUDIT_MAX_TOTAL_DECODE_MS = 8000 # 全部文件解码耗时总和上限 (毫秒)
+AUDIT_MAX_DECODED_MB = 1024 # 全部文件解码后内存总和上限 (MB)
+AUDIT_OVERSIZE_FACTOR = 4.0 # 图片像素数超过显示尺寸像素数的倍数时标记为过大
+
+# --- 观战/远程显示服务 (spectator.py) ---
+SPECTATOR_ENABLED = False # 是否在游戏运行时启动观战服务
+SPECTATOR_HOST = "127.0.0.1"
+SPECTATOR_PORT = 8765
+SPECTATOR_MAX_CLIENT_BUFFER = 256 * 1024 # 单个客户端未发送数据超过该值 (字节) 时断开，防止慢客户端拖累
+
+# --- 调度器设置 (scheduler.py) ---
+FIXED_TIMESTEP = 1 / 120 # 游戏逻辑固定步长 (秒)
+MAX_CATCHUP_STEPS = 8 # 单帧最多追赶的逻辑步数
+SLEEP_SPIN_MARGIN = 0.001 # 精确睡眠时最后自旋等待的时长 (秒)
+
+# --- 卡面延迟加载 (face_loader.py) ---
+FACE_MATERIALIZE_PER_FRAME = 1 # 每帧最多在主线程转换的已解码卡面数量
+
+# --- 自适应画质 (quality.py) ---
+# 从高到低排列；帧耗时持续超出当前档位预算时降一档，持续富余时升一档
+QUALITY_GOVERNOR_ENABLED = True
+QUALITY_TIERS = [
+    {"name": "high", "fps": FPS, "background": True, "smoothscale": True, "effects": True, "text_cache": False},
+    {"name": "medium", "fps": FPS, "background": True, "smoothscale": False, "effects": True, "text_cache": True},
+    {"name": "low", "fps": 45, "background": True, "smoothscale": False, "effects": False, "text_cache": True},
+    {"name": "minimal", "fps": 30, "background": False, "smoothscale": False, "effects": False, "text_cache": True},
+]
+GOVERNOR_WINDOW = 90 # 统计帧耗时的滑动窗口 (帧)
+GOVERNOR_DOWNGRADE_RATIO = 0.9 # 第 90 百分位帧耗时超过预算的该比例时降档
+GOVERNOR_UPGRADE_RATIO = 0.5 # 第 90 百分位帧耗时低于上一档预算的该比例时升档
+GOVERNOR_COOLDOWN = 3.0 # 两次换档之间的最短间隔 (秒)，避免来回抖动
+
+# --- 输入延迟 (input_pipeline.py) ---
+LATENCY_WINDOW = 200 # 统计点击→显示延迟的滑动窗口 (次)
+SHOW_LATENCY_OVERLAY = False # 是否在画面左下角实时显示延迟百分位
@@ -0,0 +1,190 @@
+import math
+import time
+from collections import deque
+import pygame
+import config
+
+# numpy 为可选依赖：缺失时所有特效自动退化为空操作
+try:
+    import numpy as np
+    import pygame.surfarray
+except ImportError:
+    np = None
+
+# --- 特效引擎 ---
+class Effects:
+    """基于 pygame.surfarray + NumPy 的过渡与特效，所有逐帧缓冲区预先分配"""
+
+    BENCHMARK_FRAMES = 3 # 启动基准测试的帧数
+    COST_WINDOW = 30 # 运行期耗时统计的滑动窗口 (帧)
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.size = screen.get_size()
+        self.enabled = bool(config.EFFECTS_ENABLED and np is not None and screen.get_bytesize() >= 3)
+        self.budget_ms = config.EFFECTS_FRAME_BUDGET_MS
+        self.frame_costs = deque(maxlen=self.COST_WINDOW) # 最近若干帧的特效耗时 (毫秒)
+        self.benchmark_ms = None
+        self.suspended = False # 由画质档位临时关闭 (与超预算的永久关闭不同)
+
+        self.fade_progress = 1.0 # >= 1 表示当前没有进行中的淡入淡出
+        self.pulse_phase = 0.0
+
+        if not self.enabled:
+            if config.EFFECTS_ENABLED and np is None:
+                print("提示: 未安装 numpy，特效已关闭。")
+            return
+
+        # 淡入淡出直接在表面的连续原始字节上混合 (比跨步的 pixels3d 视图快得多)，
+        # 旧画面快照 + 两个 16 位累加缓冲区 (避免 uint8 溢出)
+        buffer_len = screen.get_pitch() * screen.get_height()
+        self._snapshot = np.zeros(buffer_len, dtype=np.uint8)
+        self._acc = np.zeros(buffer_len, dtype=np.uint16)
+        self._tmp = np.zeros(buffer_len, dtype=np.uint16)
+        # 时间警告：四条屏幕边框的渐变权重及其工作缓冲区
+        self._pulse_target = np.array(config.RED, dtype=np.uint16)
+        self._pulse_strips = self._build_pulse_strips(config.TIMER_PULSE_BAND)
+
+        self.benchmark()
+
+    # --- 内部工具 ---
+    def _build_pulse_strips(self, band):
+        """预先计算边框渐变权重 (0~256)，返回 [(切片, 基础权重, 权重缓冲, 反权重缓冲, 累加缓冲, 临时缓冲)]"""
+        w, h = self.size
+        band = max(1, min(band, w // 2, h // 2))
+        ramp = np.linspace(256, 0, band, endpoint=False).astype(np.uint16) # 边缘最强，向内衰减
+        layouts = [
+            ((slice(None), slice(0, band)), ramp[np.newaxis, :, np.newaxis], (w, band)), # 上
+            ((slice(None), slice(h - band, h)), ramp[np.newaxis, ::-1, np.newaxis], (w, band)), # 下
+            # 左右两条不含四角，四角已由上下两条覆盖，避免重复混合
+            ((slice(0, band), slice(band, h - band)), ramp[:, np.newaxis, np.newaxis], (band, h - 2 * band)), # 左
+            ((slice(w - band, w), slice(band, h - band)), ramp[::-1, np.newaxis, np.newaxis], (band, h - 2 * band)), # 右
+        ]
+        strips = []
+        for region, base, shape in layouts:
+            base = np.ascontiguousarray(np.broadcast_to(base, shape + (1,)))
+            strips.append((region, base,
+                           np.zeros(shape + (1,), dtype=np.uint16),
+                           np.zeros(shape + (1,), dtype=np.uint16),
+                           np.zeros(shape + (3,), dtype=np.uint16),
+                           np.zeros(shape + (3,), dtype=np.uint16)))
+        return strips
+
+    @staticmethod
+    def _raw_bytes(surface):
+        """以一维 uint8 数组的形式返回表面像素内存 (含行填充与 alpha/填充字节)"""
+        return np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+
+    def _measure(self, started):
+        """记录一次特效耗时，滑动平均超出预算时自动关闭特效"""
+        cost_ms = (time.perf_counter() - started) * 1000.0
+        self.frame_costs.append(cost_ms)
+        if len(self.frame_costs) == self.frame_costs.maxlen:
+            average = sum(self.frame_costs) / len(self.frame_costs)
+            if average > self.budget_ms:
+                self.disable(f"平均耗时 {average:.2f}ms 超出预算 {self.budget_ms:.2f}ms")
+
+    def set_suspended(self, suspended):
+        """画质档位切换时暂停/恢复逐帧特效"""
+        self.suspended = suspended
+        if suspended:
+            self.fade_progress = 1.0
+
+    def disable(self, reason):
+        """关闭特效并释放缓冲区"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.fade_progress = 1.0
+        self._snapshot = self._acc = self._tmp = None
+        self._pulse_strips = []
+        print(f"特效已关闭: {reason}")
+
+    def benchmark(self):
+        """在离屏表面上试运行淡入淡出与警告闪烁，若单帧耗时超出预算则关闭特效"""
+        surface = pygame.Surface(self.size, 0, self.screen)
+        surface.fill(config.BLUE)
+        # 两种特效不会在同一帧出现 (警告只在 playing 状态且不处于切换中)，取较慢者
+        costs = []
+        for blend in (self._blend_crossfade, self._blend_pulse):
+            samples = []
+            for i in range(self.BENCHMARK_FRAMES):
+                started = time.perf_counter()
+                blend(surface, 128)
+                samples.append((time.perf_counter() - started) * 1000.0)
+            costs.append(min(samples))
+        self.benchmark_ms = max(costs)
+        print(f"特效基准测试: {self.benchmark_ms:.2f}ms/帧 (预算 {self.budget_ms:.2f}ms)")
+        if self.benchmark_ms > self.budget_ms:
+            self.disable("基准测试超出预算")
+
+    def _blend_crossfade(self, surface, old_weight):
+        """surface = (surface * (256 - w) + snapshot * w) >> 8"""
+        pixels = self._raw_bytes(surface)
+        np.multiply(pixels, 256 - old_weight, out=self._acc, dtype=np.uint16)
+        np.multiply(self._snapshot, old_weight, out=self._tmp, dtype=np.uint16)
+        self._acc += self._tmp
+        self._acc >>= 8
+        pixels[...] = self._acc
+        del pixels # 释放表面锁
+
+    def _blend_pulse(self, surface, strength):
+        """按边框渐变权重把屏幕边缘向警告色混合，strength 为 0~255"""
+        pixels = pygame.surfarray.pixels3d(surface)
+        for region, base, weight, inverse, acc, tmp in self._pulse_strips:
+            view = pixels[region]
+            np.multiply(base, strength, out=weight)
+            weight >>= 8
+            np.subtract(256, weight, out=inverse)
+            np.multiply(view, inverse, out=acc, dtype=np.uint16)
+            np.multiply(weight, self._pulse_target, out=tmp)
+            acc += tmp
+            acc >>= 8
+            view[...] = acc
+        del pixels
+
+    # --- 对外接口 ---
+    def start_crossfade(self):
+        """截取当前屏幕内容作为淡出画面 (在绘制新状态之前调用)"""
+        if not self.enabled or self.suspended or config.CROSSFADE_DURATION <= 0:
+            return
+        pixels = self._raw_bytes(self.screen)
+        self._snapshot[...] = pixels
+        del pixels
+        self.fade_progress = 0.0
+
+    def apply_crossfade(self, dt):
+        """把快照叠加到刚绘制好的新画面上，并推进淡入进度"""
+        if not self.enabled or self.suspended or self.fade_progress >= 1.0:
+            return
+        started = time.perf_counter()
+        self.fade_progress = min(1.0, self.fade_progress + dt / config.CROSSFADE_DURATION)
+        old_weight = int((1.0 - self.fade_progress) * 256)
+        if old_weight > 0:
+            self._blend_crossfade(self.screen, old_weight)
+        self._measure(started)
+
+    def apply_timer_pulse(self, dt, remaining_time):
+        """剩余时间不足时让屏幕边框以红色脉动"""
+        if not self.enabled or self.suspended or remaining_time >= config.TIMER_WARNING_SECONDS:
+            self.pulse_phase = 0.0
+            return
+        started = time.perf_counter()
+        self.pulse_phase = (self.pulse_phase + dt * config.TIMER_PULSE_HZ) % 1.0
+        strength = int((0.5 - 0.5 * math.cos(self.pulse_phase * 2 * math.pi)) * 255)
+        if strength > 0:
+            self._blend_pulse(self.screen, strength)
+        self._measure(started)
+
+    def dimmed(self, surface):
+        """返回 surface 按 MATCHED_DIM_FACTOR 变暗后的副本 (匹配时调用一次，之后按普通图片绘制)"""
+        if np is None or surface.get_bytesize() < 3:
+            return surface
+        result = surface.copy()
+        pixels = pygame.surfarray.pixels3d(result)
+        factor = int(config.MATCHED_DIM_FACTOR * 256)
+        buffer = np.multiply(pixels, factor, dtype=np.uint16)
+        buffer >>= 8
+        pixels[...] = buffer
+        del pixels
+        return result
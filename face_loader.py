@@ -0,0 +1,165 @@
+import math
+import threading
+import time
+import pygame
+import config
+import utils
+
+# --- 卡面延迟加载 ---
+# 卡牌创建时只使用共享的卡背，卡面交给后台线程按优先级 (离鼠标越近越先) 解码并缩放。
+# 翻牌时该卡面被提到队首，只有尚未解码完成时才会阻塞等待；等待次数与耗时会被记录。
+# 像素格式转换需要访问显示器，因此在主线程中进行 (翻牌时或每帧少量预先转换)。
+
+class FaceLoader:
+    """后台按优先级解码卡面，主线程按需取用"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pending = set() # 等待解码的 (路径, 尺寸)
+        self._priority = {} # {(路径, 尺寸): 优先级}，覆盖待解码与已解码未转换的卡面，数值越小越先处理
+        self._decoded = {} # {(路径, 尺寸): 已缩放但未转换的 Surface，解码失败时为 None}
+        self._refs = {} # {(路径, 尺寸): 持有该卡面的卡牌数}，多个会话共用同一卡面，归零时才丢弃
+        self._in_progress = None
+        self._stopped = False
+
+        # 统计
+        self.decoded_count = 0
+        self.face_requests = 0 # 卡牌第一次取用卡面的次数 (包括已预先转换好的)
+        self.waited_requests = 0 # 其中需要等待后台解码的次数
+        self.wait_ms = 0.0 # 等待总时长
+
+        self._thread = threading.Thread(target=self._work, name="face-loader", daemon=True)
+        self._thread.start()
+
+    # --- 游戏线程接口 ---
+    def request(self, path, size, priority=0.0):
+        """登记一张卡牌需要该卡面并加入解码队列 (已缓存或已在处理时只登记)，与 release 成对调用"""
+        key = (path, tuple(size))
+        with self._condition:
+            self._refs[key] = self._refs.get(key, 0) + 1
+            if utils.cached_scaled_image(path, size) is not None or key in self._decoded or key == self._in_progress:
+                return
+            self._pending.add(key)
+            self._priority[key] = priority
+            self._condition.notify()
+
+    def prioritize(self, cards, pos, offset=(0, 0)):
+        """按卡牌中心到鼠标位置的距离重新排列待解码与待转换的卡面 (offset 为卡牌坐标系相对屏幕的偏移)"""
+        self.prioritize_groups([(cards, offset)], pos)
+
+    def prioritize_groups(self, groups, pos):
+        """同 prioritize，groups 为 [(卡牌, 偏移)]，多个会话共用的卡面取所有卡牌中最近的距离"""
+        with self._condition:
+            if not self._priority:
+                return
+            distances = {}
+            for cards, offset in groups:
+                for card in cards:
+                    key = card.face_key
+                    if key in self._priority and self._priority[key] != -math.inf: # 不降低翻牌时提到队首的卡面
+                        dx = card.rect.centerx + offset[0] - pos[0]
+                        dy = card.rect.centery + offset[1] - pos[1]
+                        distances[key] = min(distances.get(key, math.inf), math.hypot(dx, dy))
+            self._priority.update(distances)
+
+    def has_pending(self):
+        with self._condition:
+            return bool(self._pending) or self._in_progress is not None
+
+    def release(self, keys):
+        """换关时释放旧卡牌的卡面，已没有卡牌持有的卡面不再解码，已解码未取用的也一并丢弃"""
+        with self._condition:
+            for key in keys:
+                count = self._refs.get(key, 0) - 1
+                if count > 0:
+                    self._refs[key] = count # 其他会话仍在使用
+                    continue
+                self._refs.pop(key, None)
+                self._pending.discard(key)
+                self._priority.pop(key, None)
+                self._decoded.pop(key, None)
+
+    def get(self, path, size):
+        """取得已转换的卡面 (每张卡第一次需要卡面时调用): 未解码完成时将其提到队首并等待"""
+        self.face_requests += 1
+        cached = utils.cached_scaled_image(path, size)
+        if cached is not None:
+            return cached
+        key = (path, tuple(size))
+        with self._condition:
+            if key not in self._decoded:
+                if key != self._in_progress:
+                    self._pending.add(key)
+                    self._priority[key] = -math.inf # 提到队首
+                    self._condition.notify()
+                started = time.perf_counter()
+                while key not in self._decoded and self._thread.is_alive():
+                    self._condition.wait(0.1) # 定期确认后台线程仍在运行
+                self.waited_requests += 1
+                self.wait_ms += (time.perf_counter() - started) * 1000.0
+            ready = key in self._decoded
+            raw = self._decoded.pop(key, None)
+            self._priority.pop(key, None)
+        if not ready: # 后台线程已停止，改为同步加载
+            return utils.load_scaled_image(path, size)
+        return self._materialize(path, size, raw)
+
+    def materialize_ready(self, limit=config.FACE_MATERIALIZE_PER_FRAME):
+        """在主线程中把至多 limit 张已解码的卡面按优先级 (离鼠标最近者先) 转换为显示格式并放入缓存，分摊翻牌时的开销。
+        解码失败 (None) 的卡面留在原处，翻牌时由 Card 显示占位图，这里不会抛出异常"""
+        for i in range(limit):
+            with self._condition:
+                ready = [key for key, raw in self._decoded.items() if raw is not None]
+                if not ready:
+                    return
+                key = min(ready, key=lambda k: self._priority.get(k, math.inf))
+                raw = self._decoded.pop(key)
+                self._priority.pop(key, None)
+            try:
+                self._materialize(key[0], key[1], raw)
+            except Exception as e:
+                print(f"无法转换节气图片 {key[0]}: {e}")
+                with self._condition:
+                    self._decoded[key] = None
+
+    def report(self):
+        """返回统计摘要"""
+        rate = self.waited_requests / self.face_requests * 100 if self.face_requests else 0.0
+        return (f"卡面: 后台解码 {self.decoded_count} 张，首次翻开 {self.face_requests} 张，"
+                f"其中 {self.waited_requests} 次需等待解码 ({rate:.0f}%，共 {self.wait_ms:.1f}ms)")
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout=1)
+
+    def _materialize(self, path, size, raw):
+        if raw is None:
+            raise pygame.error(f"卡面解码失败: {path}")
+        image = utils.convert_image(raw, path)
+        utils.cache_scaled_image(path, size, image)
+        return image
+
+    # --- 后台线程 ---
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                key = min(self._pending, key=lambda k: self._priority.get(k, math.inf))
+                self._pending.remove(key)
+                self._in_progress = key
+            path, size = key
+            try:
+                raw = utils.scale_image(pygame.image.load(path), size)
+            except Exception as e: # 任何异常都不能让线程退出，否则等待该卡面的翻牌会一直阻塞
+                print(f"无法加载节气图片 {path}: {e}")
+                raw = None
+            with self._condition:
+                self._decoded[key] = raw
+                self._in_progress = None
+                self.decoded_count += 1
+                self._condition.notify_all()
@@ -0,0 +1,134 @@
+import argparse
+import os
+import random
+import threading
+import time
+from collections import deque
+import pygame
+import config
+import utils
+
+# --- 输入管线与点击→显示延迟测量 ---
+# 1. 在 SDL 队列层面屏蔽游戏不处理的事件 (如大量的 MOUSEMOTION)，它们不会进入 Python。
+# 2. 使用事件自带的位置；pygame 不提供 SDL 事件时间戳，因此帧间睡眠改用 sleep_until_input:
+#    在 pygame.event.wait 中等待，事件一到就醒来记下到达时间，再继续睡到期限。
+#    帧内工作期间到达的事件在下一次睡眠开始时记录。
+# 3. 导致翻牌的点击一直跟踪到该帧 display.flip() 返回，记录点击→显示延迟的百分位。
+# 用法: python input_pipeline.py bench [--clicks N]   无窗口压测，输出延迟百分位
+
+ALLOWED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN)
+
+def install_event_filter(allowed=ALLOWED_EVENTS):
+    """只允许游戏实际处理的事件进入队列"""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(allowed))
+
+_arrived = [] # 已取出队列、尚未交给游戏处理的事件 [(事件, 到达时间)]
+
+def _collect(clock):
+    now = clock()
+    _arrived.extend((event, now) for event in pygame.event.get())
+
+def sleep_until_input(seconds, clock=time.perf_counter):
+    """代替 time.sleep 的帧间睡眠 (传给 Scheduler.wait)，睡眠期间到达的事件记下到达时间"""
+    deadline = clock() + seconds
+    _collect(clock) # 帧内工作期间到达的事件
+    while True:
+        timeout_ms = int((deadline - clock()) * 1000)
+        if timeout_ms <= 0:
+            return
+        event = pygame.event.wait(timeout_ms)
+        if event.type == pygame.NOEVENT: # 超时
+            return
+        _arrived.append((event, clock()))
+        _collect(clock)
+
+def poll_events(clock=time.perf_counter):
+    """取出所有事件，返回 [(事件, 到达时间)]"""
+    _collect(clock)
+    events = _arrived[:]
+    _arrived.clear()
+    return events
+
+
+class LatencyTracker:
+    """记录每次翻牌点击到对应帧显示完成的延迟"""
+
+    def __init__(self, window=None, clock=time.perf_counter):
+        self.clock = clock
+        self.samples = deque(maxlen=window or config.LATENCY_WINDOW) # 毫秒
+        self.total = 0
+        self._awaiting = [] # 已翻牌、尚未显示的点击时间戳
+
+    def flipped(self, timestamp):
+        """某次点击导致了翻牌，等待下一次 display.flip"""
+        self._awaiting.append(timestamp)
+
+    def presented(self):
+        """一帧已显示完成 (在 display.flip 之后调用)"""
+        if not self._awaiting:
+            return
+        now = self.clock()
+        for timestamp in self._awaiting:
+            self.samples.append((now - timestamp) * 1000.0)
+        self.total += len(self._awaiting)
+        self._awaiting.clear()
+
+    def percentile(self, p):
+        return utils.percentile(self.samples, p)
+
+    def summary(self):
+        if not self.samples:
+            return "点击→显示延迟: 暂无数据"
+        return (f"点击→显示延迟 (最近 {len(self.samples)} 次): p50 {self.percentile(50):.1f}ms  "
+                f"p95 {self.percentile(95):.1f}ms  p99 {self.percentile(99):.1f}ms  max {max(self.samples):.1f}ms")
+
+# --- 压测 ---
+def benchmark(clicks=200):
+    """无窗口运行真实的 Game 主循环，另一线程在随机时刻 (与帧节奏无关) 投递点击，
+    点击与真实输入一样经由 sleep_until_input / poll_events 记录到达时间，因此与实际游戏中的统计口径相同"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from game import Game # 延迟导入，确保驱动环境变量先生效
+
+    game = Game()
+    game.setup_level(0)
+    session = game.session
+    targets = [] # 主线程每帧更新的可点击卡牌中心 (整体替换，投递线程只读)
+    posted = []
+
+    def post_clicks():
+        while len(posted) < clicks and game.is_running:
+            time.sleep(random.uniform(0, 2 * game.frame_interval))
+            current = targets
+            if current:
+                pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=random.choice(current), button=1))
+                posted.append(time.perf_counter())
+
+    poster = threading.Thread(target=post_clicks, name="bench-clicks", daemon=True)
+    poster.start()
+    while poster.is_alive():
+        game.step_frame()
+        if game.game_state != "playing":
+            game.setup_level((session.current_level_index + 1) % len(config.LEVELS))
+        ready = game.game_state == "playing" and session.mismatch_timer is None and len(session.flipped_cards) < 2
+        targets = [card.rect.center for card in session.cards if not card.is_face_up and not card.is_matched] if ready else []
+        game.wait_frame()
+    for i in range(2):
+        game.step_frame() # 显示最后一次点击
+    print(f"投递点击 {len(posted)} 次，记录翻牌 {game.latency.total} 次")
+    print(game.latency.summary())
+    game.face_loader.stop()
+    pygame.quit()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="输入延迟工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="无窗口压测点击→显示延迟")
+    bench.add_argument("--clicks", type=int, default=200)
+    args = parser.parse_args(argv)
+    config.LATENCY_WINDOW = max(config.LATENCY_WINDOW, args.clicks)
+    benchmark(args.clicks)
+
+if __name__ == '__main__':
+    main()
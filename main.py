@@ -1,8 +1,11 @@
+import argparse
 import pygame
 import os
 import sys
 import config # 导入配置
+import utils
 from game import Game # 从 game 模块导入 Game 类
+from session import SplitScreenHost
 
 # --- 资源和目录检查 ---
 def check_assets():
@@ -115,13 +118,28 @@ if __name__ == '__main__':
     # 初始化 Pygame（如果 utils 或 game 中没有初始化）
     # pygame.init() # Game 类构造函数中已包含 pygame.init()
 
+    parser = argparse.ArgumentParser(description="二十四节气记忆匹配")
+    parser.add_argument("--players", type=int, default=1, choices=range(1, 5), help="分屏玩家数量 (1~4)")
+    parser.add_argument("--image-report", action="store_true", help="退出时输出每个图片的像素格式与 blit 耗时")
+    args = parser.parse_args()
+
     # 检查资源
     check_assets()
 
-    # 创建游戏实例并运行
-    game_instance = Game()
+    # 图片报告需要在加载任何图片之前开启
+    utils.set_image_report(args.image_report)
+
+    # 创建游戏实例并运行 (多名玩家时使用分屏模式)
+    if args.players > 1:
+        game_instance = SplitScreenHost(args.players)
+    else:
+        game_instance = Game()
     game_instance.run()
 
+    # 可选: 输出每个图片的像素格式选择与 blit 耗时
+    if args.image_report:
+        utils.print_image_report()
+
     # 退出 Pygame
     pygame.quit()
     sys.exit()
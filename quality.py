@@ -0,0 +1,71 @@
+import time
+from collections import deque
+import config
+import utils
+
+# --- 自适应画质 ---
+# 根据最近若干帧的耗时 (不含睡眠) 在 config.QUALITY_TIERS 之间切换，
+# 降档与升档使用不同阈值并有冷却时间 (滞回)，避免在两个档位之间来回抖动。
+
+class QualityGovernor:
+    """监控帧耗时并在画质档位之间切换，档位变化时通知监听者并打印日志"""
+
+    def __init__(self, tiers=config.QUALITY_TIERS, start_tier=0, clock=time.monotonic):
+        self.tiers = tiers
+        self.tier_index = start_tier
+        self.clock = clock
+        self.enabled = config.QUALITY_GOVERNOR_ENABLED
+        self.frame_times = deque(maxlen=config.GOVERNOR_WINDOW) # 毫秒
+        self.changes = [] # [(时间, 原档位名, 新档位名, 第90百分位耗时)]
+        self._listeners = []
+        self._last_change = clock()
+
+    @property
+    def tier(self):
+        """当前档位的设置字典"""
+        return self.tiers[self.tier_index]
+
+    @property
+    def tier_name(self):
+        return self.tier["name"]
+
+    def on_change(self, callback):
+        """注册档位变化回调 callback(tier)，注册时立即以当前档位调用一次"""
+        self._listeners.append(callback)
+        callback(self.tier)
+
+    def budget_ms(self, tier_index=None):
+        """档位对应的每帧耗时预算 (毫秒)"""
+        tier = self.tiers[self.tier_index if tier_index is None else tier_index]
+        return 1000.0 / tier["fps"]
+
+    def percentile(self, p):
+        return utils.percentile(self.frame_times, p)
+
+    def record(self, frame_ms):
+        """记录一帧的耗时，窗口填满且冷却结束后评估是否换档"""
+        self.frame_times.append(frame_ms)
+        if not self.enabled or len(self.frame_times) < self.frame_times.maxlen:
+            return
+        if self.clock() - self._last_change < config.GOVERNOR_COOLDOWN:
+            return
+        p90 = self.percentile(90)
+        if p90 > self.budget_ms() * config.GOVERNOR_DOWNGRADE_RATIO and self.tier_index < len(self.tiers) - 1:
+            self.set_tier(self.tier_index + 1, p90)
+        elif self.tier_index > 0 and p90 < self.budget_ms(self.tier_index - 1) * config.GOVERNOR_UPGRADE_RATIO:
+            self.set_tier(self.tier_index - 1, p90)
+
+    def set_tier(self, index, p90=None):
+        """切换到指定档位 (也可手动调用)"""
+        index = max(0, min(index, len(self.tiers) - 1))
+        if index == self.tier_index:
+            return
+        previous = self.tier_name
+        self.tier_index = index
+        self._last_change = self.clock()
+        self.frame_times.clear()
+        self.changes.append((time.time(), previous, self.tier_name, p90))
+        detail = f" (p90 帧耗时 {p90:.1f}ms)" if p90 is not None else ""
+        print(f"画质档位: {previous} -> {self.tier_name}{detail}")
+        for callback in self._listeners:
+            callback(self.tier)
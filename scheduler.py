@@ -0,0 +1,133 @@
+import heapq
+import itertools
+import math
+import time
+import config
+
+# --- 调度器 ---
+# 基于单调时钟的固定步长更新循环 + 截止时间回调堆。
+# 游戏逻辑以固定步长推进 (不受帧率波动和系统时钟调整影响)，倒计时改为注册回调，
+# 主循环可以查询下一个截止时间并精确睡眠到那一刻，而不是每帧轮询。
+# 每个会话有自己的 TimerQueue，只在会话被推进时走时 (例如单人模式打开菜单时棋盘与倒计时一起暂停)。
+
+class Timer:
+    """call_later 返回的句柄，可用于取消回调"""
+    __slots__ = ("deadline", "callback", "args", "active")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def cancel(self):
+        self.active = False
+
+
+class TimerQueue:
+    """截止时间回调堆，按自己的模拟时间触发，tick() 推进时间"""
+
+    def __init__(self):
+        self.time = 0.0 # 模拟时间 (秒)
+        self._heap = []
+        self._sequence = itertools.count() # 截止时间相同时按注册顺序触发
+
+    def call_later(self, delay, callback, *args):
+        """在 delay 秒 (模拟时间) 后调用 callback(*args)"""
+        timer = Timer(self.time + delay, callback, args)
+        heapq.heappush(self._heap, (timer.deadline, next(self._sequence), timer))
+        return timer
+
+    def next_deadline(self):
+        """最早的未取消截止时间 (模拟时间)，没有时返回 None"""
+        while self._heap and not self._heap[0][2].active:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def time_until_next_deadline(self):
+        """距最早截止时间还差的模拟时间，没有时返回 None"""
+        deadline = self.next_deadline()
+        return None if deadline is None else max(0.0, deadline - self.time)
+
+    def _run_due(self):
+        while self._heap and self._heap[0][0] <= self.time:
+            timer = heapq.heappop(self._heap)[2]
+            if timer.active:
+                timer.active = False
+                timer.callback(*timer.args)
+
+    def tick(self, step):
+        """推进 step 秒模拟时间并触发到期回调"""
+        self.time += step
+        self._run_due()
+
+
+class Scheduler(TimerQueue):
+    """固定步长调度器: advance() 推进模拟时间并触发到期回调，wait() 睡眠到下一帧或下一个截止时间"""
+
+    def __init__(self, step=config.FIXED_TIMESTEP, max_steps=config.MAX_CATCHUP_STEPS, clock=time.monotonic):
+        super().__init__() # time 只按固定步长增加
+        self.step = step
+        self.max_steps = max_steps # 每帧最多追赶的步数，超出部分丢弃，避免掉帧后越追越慢
+        self.clock = clock
+        self.accumulator = 0.0 # 尚未消耗的真实时间
+        self.frame_dt = 0.0 # 最近一帧的真实时长
+        self.dropped_time = 0.0 # 因追赶上限而丢弃的时间总和
+        self._last = clock()
+
+    # --- 主循环 ---
+    def advance(self, update=None):
+        """按真实流逝时间推进若干固定步，每步先触发到期回调再调用 update(step)，返回执行的步数"""
+        now = self.clock()
+        self.frame_dt = now - self._last
+        self._last = now
+        self.accumulator += self.frame_dt
+        steps = 0
+        while self.accumulator >= self.step:
+            if steps >= self.max_steps:
+                dropped = self.accumulator - self.accumulator % self.step
+                self.dropped_time += dropped
+                self.accumulator -= dropped
+                break
+            self.accumulator -= self.step
+            steps += 1
+            self.tick(self.step)
+            if update:
+                update(self.step)
+        return steps
+
+    @property
+    def alpha(self):
+        """渲染插值系数: 当前位于两个逻辑步之间的位置 (0~1)"""
+        return self.accumulator / self.step
+
+    def render_time(self):
+        """用于绘制的插值模拟时间"""
+        return self.time + self.accumulator
+
+    def seconds_until_next_deadline(self, delays=()):
+        """距离下一个回调实际被触发还需等待的真实时间 (秒)，没有回调时返回 None。
+        delays 为随本调度器同步推进的其他 TimerQueue (如会话计时器) 距各自截止时间的模拟时间"""
+        delays = [delay for delay in delays if delay is not None]
+        own = self.time_until_next_deadline()
+        if own is not None:
+            delays.append(own)
+        if not delays:
+            return None
+        # 回调在模拟时间越过截止时间的那一步触发
+        steps_needed = max(0, math.ceil(min(delays) / self.step - 1e-9))
+        elapsed = self.clock() - self._last
+        return max(0.0, steps_needed * self.step - self.accumulator - elapsed)
+
+    def wait(self, frame_interval, delays=(), sleep=time.sleep):
+        """睡眠到下一帧开始或下一个截止时间 (取较早者)，最后一小段自旋以保证精度。
+        sleep 可替换为在睡眠期间记录输入到达时间的函数"""
+        target = self._last + frame_interval
+        until_deadline = self.seconds_until_next_deadline(delays)
+        if until_deadline is not None:
+            target = min(target, self.clock() + until_deadline)
+        remaining = target - self.clock()
+        if remaining > config.SLEEP_SPIN_MARGIN:
+            sleep(remaining - config.SLEEP_SPIN_MARGIN)
+        while self.clock() < target:
+            pass
@@ -0,0 +1,484 @@
+import abc
+import copy
+import random
+import time
+from collections import deque
+import pygame
+import config
+import utils
+from card import Card
+from scheduler import Scheduler, TimerQueue
+from face_loader import FaceLoader
+from quality import QualityGovernor
+import input_pipeline
+
+# --- 会话与宿主 ---
+# GameSession 是唯一的规则实现: 保存一名玩家的棋盘、翻开的牌、计时器、统计与成就。
+# SessionHost 在同一个循环中驱动若干会话: 单人模式 (Game) 以整个屏幕为视口驱动一个会话，
+# 分屏模式 (SplitScreenHost) 每名玩家一个视口。卡面、卡背、字体和声音都通过 utils 中的缓存共享，
+# 背景每帧只绘制一次，因此内存与帧耗时不会随玩家数量成倍增长。
+
+class GameSession:
+    """单个玩家的棋盘：卡牌、翻开的牌、计时器、统计与成就，可绘制到自己的视口中"""
+
+    def __init__(self, player_index, viewport, screen, face_loader, effects=None, deck_source=None):
+        self.player_index = player_index
+        self.face_loader = face_loader # 宿主共享的卡面解码器
+        self.deck_source = deck_source # deck_source(关卡, 第几次进入) -> 卡牌数据，宿主借此让所有会话共用一副牌
+        self.effects = effects # 可选，用于已匹配卡牌变暗
+        self.viewport = pygame.Rect(viewport)
+        self.surface = screen.subsurface(self.viewport) # 与屏幕共享像素，无额外内存
+        self.text_scale = min(self.viewport.width / config.SCREEN_WIDTH, self.viewport.height / config.SCREEN_HEIGHT)
+
+        self.state = "playing" # playing, level_complete, game_over, all_levels_complete
+        self.current_level_index = 0
+        self.level_plays = {} # {关卡: 已进入次数}
+        self.cards = pygame.sprite.Group()
+        self.flipped_cards = []
+        self.matched_pairs = 0
+        self.total_pairs = 0
+        self.attempts = 0
+        self.mistakes_current_level = 0
+
+        self.elapsed_time = 0
+        self.level_time_limit = 0
+
+        # 本会话的倒计时只随 update() 走时，宿主不推进本会话时 (如打开菜单) 一起暂停
+        self.timers = TimerQueue()
+        # 以下计时器为 TimerQueue.call_later 返回的句柄，未激活时为 None
+        self.mismatch_timer = None # 错误匹配后将卡牌翻回
+        self.show_name_timer = None # 隐藏节气名称
+        self.show_achievement_timer = None # 隐藏成就弹窗
+        self.item_name_to_show = ""
+        self.item_name_pos = (0, 0)
+
+        # 成就: config.achievements 只是定义，每名玩家有自己的解锁进度
+        self.achievements = copy.deepcopy(config.achievements)
+        self.achievement_to_show = None
+        self.newly_unlocked_achievements = [] # 本关解锁的成就
+
+        # 跨关卡累计的统计
+        self.stats = self._new_stats()
+
+        # 声音 (缓存共享)
+        self.match_sound = utils.load_sound("match.wav")
+        self.win_sound = utils.load_sound("win.wav")
+
+    @staticmethod
+    def _new_stats():
+        return {"levels_completed": 0, "attempts": 0, "mistakes": 0, "play_time": 0.0}
+
+    def _font_size(self, size):
+        """按视口比例缩放字号"""
+        return max(12, int(size * self.text_scale))
+
+    def setup_level(self, level_index):
+        """设置新关卡 (布局按视口尺寸计算)"""
+        if level_index >= len(config.LEVELS):
+            self.check_achievements(all_levels_completed=True) # 检查是否解锁最终成就
+            self.state = "all_levels_complete"
+            return
+
+        level_data = config.LEVELS[level_index]
+        self.current_level_index = level_index
+        grid_rows, grid_cols = level_data["grid"]
+        theme = level_data["theme"]
+        self.level_time_limit = level_data.get("time_limit", 0)
+
+        old_faces = [card.face_key for card in self.cards] # 新卡牌登记之后再释放，两关共用的卡面不会被丢弃
+        self.cards.empty()
+        self.flipped_cards = []
+        self.matched_pairs = 0
+        self.total_pairs = (grid_rows * grid_cols) // 2
+        self.attempts = 0
+        self.mistakes_current_level = 0
+        self.newly_unlocked_achievements = []
+
+        card_size, start_x, start_y = utils.card_layout(grid_rows, grid_cols, self.viewport.width, self.viewport.height)
+        play = self.level_plays.get(level_index, 0)
+        self.level_plays[level_index] = play + 1
+        if self.deck_source:
+            card_data = self.deck_source(level_index, play)
+        else:
+            card_data = utils.pick_card_data(theme, self.total_pairs)
+        if card_data is None:
+            self.face_loader.release(old_faces)
+            self.state = "game_over"
+            return
+
+        paired_card_data = card_data * 2
+        random.shuffle(paired_card_data)
+        for index, (item_name, image_path) in enumerate(paired_card_data):
+            row, col = divmod(index, grid_cols)
+            card = Card(item_name, theme, card_size, image_path, self.face_loader)
+            card.rect.topleft = (start_x + col * (card_size[0] + config.CARD_PADDING),
+                                 start_y + row * (card_size[1] + config.CARD_PADDING))
+            self.cards.add(card)
+            self.face_loader.request(image_path, card_size)
+        self.face_loader.release(old_faces) # 只丢弃已没有任何会话持有的卡面
+        # 离鼠标越近越先解码
+        self.face_loader.prioritize(self.cards, pygame.mouse.get_pos(), self.viewport.topleft)
+
+        # 设置状态和计时器 (取消上一关残留的回调)
+        self.state = "playing"
+        self.elapsed_time = 0
+        for timer in (self.mismatch_timer, self.show_name_timer):
+            if timer:
+                timer.cancel()
+        self.mismatch_timer = None
+        self.show_name_timer = None
+        self.item_name_to_show = ""
+
+    def handle_click(self, pos):
+        """处理落在本视口内的点击，pos 为屏幕坐标；翻开了一张牌时返回 True"""
+        if self.state == "level_complete":
+            self.setup_level(self.current_level_index + 1)
+            return False
+        if self.state in ("game_over", "all_levels_complete"):
+            self.stats = self._new_stats()
+            self.setup_level(0)
+            return False
+        if self.state != "playing" or self.mismatch_timer is not None or len(self.flipped_cards) >= 2:
+            return False
+
+        local_pos = (pos[0] - self.viewport.x, pos[1] - self.viewport.y)
+        for card in self.cards:
+            # 只能点击未匹配、未翻开的卡牌
+            if not card.is_matched and not card.is_face_up and card.handle_click(local_pos):
+                card.flip()
+                self.flipped_cards.append(card)
+                # 如果翻开了第二张，增加尝试次数
+                if len(self.flipped_cards) == 2:
+                    self.attempts += 1
+                    self.stats["attempts"] += 1
+                return True
+        return False
+
+    def check_matches(self):
+        """检查翻开的两张牌是否匹配"""
+        if len(self.flipped_cards) != 2:
+            return
+        card1, card2 = self.flipped_cards
+        if card1.item_name == card2.item_name: # 匹配成功
+            card1.is_matched = True
+            card2.is_matched = True
+            # 已匹配卡牌变暗 (只计算一次，之后按普通图片绘制)
+            if self.effects and self.effects.enabled:
+                card1.image = self.effects.dimmed(card1.image_front)
+                card2.image = self.effects.dimmed(card2.image_front)
+            self.matched_pairs += 1
+            if self.match_sound:
+                self.match_sound.play()
+
+            # 在两张卡牌中间靠上的位置显示节气名称
+            self.item_name_to_show = card1.item_name
+            center_x = (card1.rect.centerx + card2.rect.centerx) // 2
+            center_y = min(card1.rect.top, card2.rect.top) - 20
+            self.item_name_pos = (center_x, center_y)
+            if self.show_name_timer:
+                self.show_name_timer.cancel()
+            self.show_name_timer = self.timers.call_later(config.SHOW_NAME_DURATION, self.hide_item_name)
+            self.flipped_cards = []
+
+            if self.matched_pairs == self.total_pairs:
+                self.state = "level_complete"
+                self.stats["levels_completed"] += 1
+                if self.win_sound:
+                    self.win_sound.play()
+                self.check_achievements(level_won=True) # 检查关卡胜利相关的成就
+        else: # 匹配失败，稍后将卡牌翻回
+            self.mistakes_current_level += 1
+            self.stats["mistakes"] += 1
+            self.mismatch_timer = self.timers.call_later(config.MISMATCH_DELAY, self.flip_back_mismatched)
+
+    def check_achievements(self, level_won=False, all_levels_completed=False):
+        """检查并解锁本玩家的成就，关卡胜利时新解锁的第一个成就以弹窗显示"""
+        candidates = []
+        if level_won:
+            theme = config.LEVELS[self.current_level_index]["theme"]
+            if theme == "spring":
+                candidates.append("complete_spring") # 春之初识
+            if theme == "summer" and self.elapsed_time <= 45:
+                candidates.append("fast_summer") # 夏日疾风
+            if theme == "autumn" and self.mistakes_current_level == 0:
+                candidates.append("perfect_autumn") # 秋之零误
+        if all_levels_completed:
+            candidates.append("complete_all") # 四季轮回，在全部完成界面显示，不弹窗
+
+        for key in candidates:
+            achievement = self.achievements[key]
+            if achievement["unlocked"]:
+                continue
+            achievement["unlocked"] = True
+            print(f"玩家 {self.player_index + 1} 成就解锁: {achievement['name']}")
+            if key != "complete_all":
+                self.newly_unlocked_achievements.append(achievement)
+
+        if self.newly_unlocked_achievements and level_won:
+            self.achievement_to_show = self.newly_unlocked_achievements[0]
+            if self.show_achievement_timer:
+                self.show_achievement_timer.cancel()
+            self.show_achievement_timer = self.timers.call_later(3.0, self.hide_achievement) # 显示 3 秒
+
+    def unlocked_count(self):
+        return sum(1 for achievement in self.achievements.values() if achievement["unlocked"])
+
+    def flip_back_mismatched(self):
+        """错误匹配的延迟结束，将不匹配的卡牌翻回去"""
+        self.mismatch_timer = None
+        for card in self.flipped_cards:
+            if not card.is_matched:
+                card.flip(flag=False) # 翻回背面
+        self.flipped_cards = []
+
+    def hide_item_name(self):
+        """节气名称显示时间到"""
+        self.show_name_timer = None
+        self.item_name_to_show = ""
+
+    def hide_achievement(self):
+        """成就弹窗显示时间到"""
+        self.show_achievement_timer = None
+        self.achievement_to_show = None
+
+    def update(self, step):
+        """以固定步长推进本会话的倒计时回调、计时与匹配逻辑"""
+        self.timers.tick(step)
+        if self.state != "playing":
+            return
+        self.cards.update(step)
+        self.elapsed_time += step
+        self.stats["play_time"] += step
+        if self.level_time_limit > 0 and self.elapsed_time > self.level_time_limit:
+            self.state = "game_over"
+            return
+        # 如果没有在等待翻回，检查是否有两张牌需要匹配
+        if self.mismatch_timer is None:
+            self.check_matches()
+
+    def summary(self):
+        """本玩家的累计统计"""
+        stats = self.stats
+        return (f"玩家 {self.player_index + 1}: 完成 {stats['levels_completed']} 关，尝试 {stats['attempts']} 次，"
+                f"错误 {stats['mistakes']} 次，用时 {stats['play_time']:.0f}s，"
+                f"成就 {self.unlocked_count()}/{len(self.achievements)}")
+
+    def draw(self):
+        """把本会话绘制到自己的视口 (背景由宿主统一绘制)"""
+        surface = self.surface
+        width, height = self.viewport.size
+        self.cards.draw(surface)
+
+        if self.level_time_limit > 0:
+            remaining_time = self.level_time_limit - int(self.elapsed_time)
+            timer_text = f"剩余: {remaining_time}s"
+            timer_color = config.RED if remaining_time < 10 else config.WHITE
+        else:
+            timer_text = f"用时: {int(self.elapsed_time)}s"
+            timer_color = config.WHITE
+        utils.draw_text(surface, f"玩家 {self.player_index + 1}", self._font_size(30), 10, 8, config.WHITE)
+        utils.draw_text(surface, f"匹配 {self.matched_pairs}/{self.total_pairs}  尝试 {self.attempts}",
+                        self._font_size(30), width // 2, 8 + self._font_size(30) // 2, config.WHITE, center=True)
+        utils.draw_text(surface, timer_text, self._font_size(30), width - self._font_size(30) * 6, 8, timer_color)
+
+        if self.item_name_to_show:
+            utils.draw_text(surface, self.item_name_to_show, self._font_size(36), self.item_name_pos[0], self.item_name_pos[1], config.GREEN, center=True)
+        if self.achievement_to_show:
+            utils.draw_text(surface, f"成就解锁: {self.achievement_to_show['name']}", self._font_size(28),
+                            width // 2, height - self._font_size(28) * 2, config.GREEN, center=True)
+
+        if self.state != "playing":
+            messages = {
+                "level_complete": ("关卡完成!", "点击进入下一关"),
+                "game_over": ("时间到!", "点击重新开始"),
+                "all_levels_complete": ("全部完成!", "点击重新开始"),
+            }
+            title, prompt = messages.get(self.state, (self.state, ""))
+            stats = self.stats
+            totals = (f"累计: 完成 {stats['levels_completed']} 关  尝试 {stats['attempts']}  错误 {stats['mistakes']}  "
+                      f"成就 {self.unlocked_count()}/{len(self.achievements)}")
+            utils.draw_text(surface, title, self._font_size(64), width // 2, height // 2 - self._font_size(40), config.WHITE, center=True)
+            utils.draw_text(surface, prompt, self._font_size(30), width // 2, height // 2 + self._font_size(30), config.WHITE, center=True)
+            utils.draw_text(surface, totals, self._font_size(24), width // 2, height // 2 + self._font_size(80), config.WHITE, center=True)
+
+
+class SessionHost(abc.ABC):
+    """在一个屏幕和一个主循环中驱动 GameSession: 共享调度器、卡面解码线程、输入管线、背景与画质档位"""
+
+    def __init__(self, caption):
+        pygame.init()
+        pygame.mixer.init()
+        self.screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        pygame.display.set_caption(caption)
+        # 输入: 在 SDL 队列层面过滤无用事件，并测量点击→显示延迟
+        input_pipeline.install_event_filter()
+        self.latency = input_pipeline.LatencyTracker()
+        self.scheduler = Scheduler() # 单调时钟 + 固定步长，所有会话共用
+        self.face_loader = FaceLoader() # 所有会话共用一个后台卡面解码线程
+        self.is_running = True
+        self.dt = 0 # 最近一帧的真实时长 (用于特效动画)
+        self.frame_times = deque(maxlen=300) # 最近若干帧的更新+绘制耗时 (毫秒)
+        self.sessions = []
+        self._decks = {} # {(关卡, 第几次进入): 卡牌数据}
+
+        # 共享资源: 背景只解码一次，每帧只绘制一次 (background_img 为当前实际绘制的背景，低画质档位下为 None)
+        try:
+            self.background_full = utils.load_image("background.png", (config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        except Exception as e:
+            print(f"加载背景图片失败: {e}")
+            self.background_full = None
+        self.background_img = self.background_full
+        self.bgm = utils.load_sound("bgm.wav")
+        if self.bgm:
+            self.bgm.play(loops=-1) # 循环播放
+
+        # 自适应画质: 子类准备好自己的资源后调用 self.governor.on_change(self.apply_quality)
+        self.frame_interval = 1.0 / config.FPS
+        self.governor = QualityGovernor()
+
+    def apply_quality(self, tier):
+        """应用画质档位的渲染设置"""
+        self.frame_interval = 1.0 / tier["fps"]
+        self.background_img = self.background_full if tier["background"] else None
+        utils.set_text_cache(tier["text_cache"])
+
+    def deck_for(self, level_index, play):
+        """各会话第 play 次进入 level_index 关时共用的卡牌数据 (每名玩家各自洗牌)，同一卡面只解码一次"""
+        key = (level_index, play)
+        if key not in self._decks:
+            level_data = config.LEVELS[level_index]
+            grid_rows, grid_cols = level_data["grid"]
+            self._decks[key] = utils.pick_card_data(level_data["theme"], (grid_rows * grid_cols) // 2)
+        return self._decks[key]
+
+    def session_at(self, pos):
+        """返回视口包含屏幕坐标 pos 的会话"""
+        for session in self.sessions:
+            if session.viewport.collidepoint(pos):
+                return session
+        return None
+
+    def handle_events(self):
+        """处理事件，只会收到 input_pipeline.ALLOWED_EVENTS 中的类型"""
+        for event, timestamp in input_pipeline.poll_events():
+            self.handle_event(event, timestamp)
+
+    def handle_event(self, event, timestamp):
+        if event.type == pygame.QUIT:
+            self.is_running = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.is_running = False
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.click(event.pos, timestamp)
+
+    def click(self, pos, timestamp):
+        """把点击分发给对应视口的会话，翻牌的点击一直跟踪到显示"""
+        session = self.session_at(pos)
+        if session and session.handle_click(pos):
+            self.latency.flipped(timestamp)
+
+    def active_sessions(self):
+        """本帧被推进的会话"""
+        return self.sessions
+
+    def update(self, step):
+        for session in self.active_sessions():
+            session.update(step)
+
+    def timer_delays(self):
+        """被推进的会话距各自下一个倒计时的模拟时间，供 Scheduler.wait 准时醒来"""
+        return [session.timers.time_until_next_deadline() for session in self.active_sessions()]
+
+    def prefetch_faces(self):
+        """按鼠标位置调整各会话卡面的解码与转换顺序，并在主线程转换少量已解码的卡面"""
+        groups = [(session.cards, session.viewport.topleft) for session in self.sessions if session.state == "playing"]
+        self.face_loader.prioritize_groups(groups, pygame.mouse.get_pos())
+        self.face_loader.materialize_ready()
+
+    def draw_background(self, fallback=config.BLUE):
+        if self.background_img:
+            self.screen.blit(self.background_img, (0, 0))
+        else:
+            self.screen.fill(fallback)
+
+    @abc.abstractmethod
+    def draw(self):
+        """绘制一帧并调用 present() 显示"""
+
+    def present(self):
+        """显示这一帧，并结算等待显示的翻牌点击"""
+        if config.SHOW_LATENCY_OVERLAY:
+            utils.draw_text(self.screen, self.latency.summary(), 16, 10, config.SCREEN_HEIGHT - 55, config.WHITE)
+        pygame.display.flip()
+        self.latency.presented()
+
+    def step_frame(self):
+        """执行一帧: 输入、固定步长逻辑、绘制与显示 (不含帧间睡眠)"""
+        started = time.perf_counter()
+        self.handle_events()
+        self.scheduler.advance(self.update) # 按固定步长推进逻辑并触发到期回调
+        self.dt = self.scheduler.frame_dt
+        self.draw()
+        self.prefetch_faces()
+        frame_ms = (time.perf_counter() - started) * 1000.0 # 只统计实际工作耗时，不含睡眠
+        self.frame_times.append(frame_ms)
+        self.governor.record(frame_ms)
+
+    def run(self):
+        """主循环: 所有会话共用一次事件处理、一次背景绘制和一次 display.flip"""
+        while self.is_running:
+            self.step_frame()
+            self.wait_frame()
+        self.shutdown()
+
+    def wait_frame(self):
+        """睡眠到下一帧或下一个截止时间，期间到达的输入记下到达时间"""
+        self.scheduler.wait(self.frame_interval, self.timer_delays(), input_pipeline.sleep_until_input)
+
+    def shutdown(self):
+        """打印统计并释放资源"""
+        if self.frame_times:
+            average = sum(self.frame_times) / len(self.frame_times)
+            print(f"{len(self.sessions)} 个会话: 平均帧耗时 {average:.2f}ms，画质档位 {self.governor.tier_name}")
+        for session in self.sessions:
+            print(session.summary())
+        print(self.latency.summary())
+        print(self.face_loader.report())
+        self.face_loader.stop()
+        pygame.quit()
+
+
+class SplitScreenHost(SessionHost):
+    """在一个屏幕中运行 2~4 个 GameSession，每名玩家一个视口"""
+
+    def __init__(self, player_count):
+        if not 1 <= player_count <= 4:
+            raise ValueError(f"玩家数量必须在 1 到 4 之间: {player_count}")
+        super().__init__(f"二十四节气记忆匹配 - {player_count} 人分屏")
+        self.sessions = [GameSession(i, rect, self.screen, self.face_loader, deck_source=self.deck_for)
+                         for i, rect in enumerate(self.viewports(player_count, config.SCREEN_WIDTH, config.SCREEN_HEIGHT))]
+        for session in self.sessions:
+            session.setup_level(0)
+        # 分屏模式没有逐帧特效，只调整帧率、背景与文字缓存
+        self.governor.on_change(self.apply_quality)
+
+    @staticmethod
+    def viewports(count, width, height):
+        """按玩家数量划分视口: 1 人全屏，2 人左右分屏，3~4 人 2x2 网格"""
+        if count == 1:
+            return [pygame.Rect(0, 0, width, height)]
+        if count == 2:
+            return [pygame.Rect(0, 0, width // 2, height), pygame.Rect(width // 2, 0, width - width // 2, height)]
+        half_w, half_h = width // 2, height // 2
+        cells = [pygame.Rect(0, 0, half_w, half_h), pygame.Rect(half_w, 0, width - half_w, half_h),
+                 pygame.Rect(0, half_h, half_w, height - half_h), pygame.Rect(half_w, half_h, width - half_w, height - half_h)]
+        return cells[:count]
+
+    def draw(self):
+        self.draw_background()
+        for session in self.sessions:
+            session.draw()
+        # 视口分隔线
+        for session in self.sessions:
+            pygame.draw.rect(self.screen, config.WHITE, session.viewport, 2)
+        self.present()
@@ -0,0 +1,410 @@
+import argparse
+import asyncio
+import os
+import random
+import struct
+import threading
+import time
+from collections import namedtuple
+import pygame
+import config
+import utils
+
+# --- 观战 / 远程显示服务 ---
+# 游戏把状态发布给 SpectatorServer，客户端连接后先收到一次完整快照，之后只在状态变化时
+# 收到紧凑的二进制增量。用法:
+#   python spectator.py viewer [--host H] [--port P]      参考观战客户端 (使用本地资源缓存绘制)
+#   python spectator.py bench [--clients N] [--updates M] 回环压测: 每客户端带宽与分发延迟
+#
+# 消息格式: 1 字节类型 + 4 字节负载长度 (网络字节序) + 负载
+#   快照: 状态码, 关卡, 已匹配, 尝试次数, 计时(秒), 卡牌数, 每张卡 (x, y, w, h, 节气名, 图片相对路径), 每张卡状态位
+#   增量: 1 字节字段掩码, 依次为变化的字段; 卡牌变化为 数量 + (序号, 状态位) 列表
+
+MSG_SNAPSHOT = 1
+MSG_DELTA = 2
+HEADER = struct.Struct("!BI")
+SCALARS = struct.Struct("!BBBHh") # 状态码, 关卡, 已匹配, 尝试次数, 计时
+CARD_RECT = struct.Struct("!hhHH")
+
+GAME_STATES = ("menu", "playing", "level_complete", "game_over", "all_levels_complete")
+FACE_UP = 0x01
+MATCHED = 0x02
+
+# 增量掩码位
+DELTA_STATE, DELTA_LEVEL, DELTA_MATCHED, DELTA_ATTEMPTS, DELTA_TIMER, DELTA_CARDS = (1 << i for i in range(6))
+DELTA_FIELDS = [(DELTA_STATE, "state", "!B"), (DELTA_LEVEL, "level", "!B"), (DELTA_MATCHED, "matched_pairs", "!B"),
+                (DELTA_ATTEMPTS, "attempts", "!H"), (DELTA_TIMER, "timer", "!h")]
+
+# 游戏状态的不可变视图，布局只在换关时变化
+SpectatorState = namedtuple("SpectatorState", "state level matched_pairs attempts timer layout card_bits")
+
+def capture_state(session, state=None):
+    """从 GameSession 中提取观战所需的状态，state 默认为会话状态 (单人模式的菜单由 Game 传入)"""
+    state = state or session.state
+    cards = list(session.cards)
+    layout = tuple((card.rect.x, card.rect.y, card.rect.width, card.rect.height, card.item_name,
+                    os.path.relpath(card.image_path, config.IMG_DIR)) for card in cards)
+    card_bits = bytes((FACE_UP if card.is_face_up else 0) | (MATCHED if card.is_matched else 0) for card in cards)
+    if session.level_time_limit > 0:
+        timer = session.level_time_limit - int(session.elapsed_time) # 与界面一致: 剩余秒数
+    else:
+        timer = int(session.elapsed_time)
+    state_code = GAME_STATES.index(state) if state in GAME_STATES else 0
+    return SpectatorState(state_code, session.current_level_index, session.matched_pairs, session.attempts, timer, layout, card_bits)
+
+# --- 编码 / 解码 ---
+def _pack_text(text):
+    data = text.encode("utf-8")
+    return struct.pack("!H", len(data)) + data
+
+def encode_snapshot(state):
+    parts = [SCALARS.pack(state.state, state.level, state.matched_pairs, state.attempts, state.timer),
+             struct.pack("!B", len(state.layout))]
+    for x, y, w, h, name, path in state.layout:
+        parts.append(CARD_RECT.pack(x, y, w, h))
+        parts.append(_pack_text(name))
+        parts.append(_pack_text(path))
+    parts.append(state.card_bits)
+    payload = b"".join(parts)
+    return HEADER.pack(MSG_SNAPSHOT, len(payload)) + payload
+
+def encode_delta(old, new):
+    """编码两次状态之间的差异，没有变化时返回 None"""
+    mask = 0
+    parts = []
+    for bit, field, fmt in DELTA_FIELDS:
+        value = getattr(new, field)
+        if value != getattr(old, field):
+            mask |= bit
+            parts.append(struct.pack(fmt, value))
+    if new.card_bits != old.card_bits:
+        changed = [(i, b) for i, (a, b) in enumerate(zip(old.card_bits, new.card_bits)) if a != b]
+        mask |= DELTA_CARDS
+        parts.append(struct.pack("!B", len(changed)))
+        parts.extend(struct.pack("!BB", i, b) for i, b in changed)
+    if not mask:
+        return None
+    payload = struct.pack("!B", mask) + b"".join(parts)
+    return HEADER.pack(MSG_DELTA, len(payload)) + payload
+
+def decode_snapshot(payload):
+    state, level, matched, attempts, timer = SCALARS.unpack_from(payload, 0)
+    offset = SCALARS.size
+    (count,) = struct.unpack_from("!B", payload, offset)
+    offset += 1
+    layout = []
+    for i in range(count):
+        x, y, w, h = CARD_RECT.unpack_from(payload, offset)
+        offset += CARD_RECT.size
+        texts = []
+        for j in range(2):
+            (length,) = struct.unpack_from("!H", payload, offset)
+            offset += 2
+            texts.append(payload[offset:offset + length].decode("utf-8"))
+            offset += length
+        layout.append((x, y, w, h, texts[0], texts[1]))
+    card_bits = bytes(payload[offset:offset + count])
+    return SpectatorState(state, level, matched, attempts, timer, tuple(layout), card_bits)
+
+def apply_delta(state, payload):
+    """把增量应用到本地镜像，返回新状态"""
+    (mask,) = struct.unpack_from("!B", payload, 0)
+    offset = 1
+    changes = {}
+    for bit, field, fmt in DELTA_FIELDS:
+        if mask & bit:
+            (changes[field],) = struct.unpack_from(fmt, payload, offset)
+            offset += struct.calcsize(fmt)
+    if mask & DELTA_CARDS:
+        card_bits = bytearray(state.card_bits)
+        (count,) = struct.unpack_from("!B", payload, offset)
+        offset += 1
+        for i in range(count):
+            index, bits = struct.unpack_from("!BB", payload, offset)
+            offset += 2
+            card_bits[index] = bits
+        changes["card_bits"] = bytes(card_bits)
+    return state._replace(**changes)
+
+async def read_message(reader):
+    """读取一条消息，返回 (类型, 负载)"""
+    header = await reader.readexactly(HEADER.size)
+    kind, length = HEADER.unpack(header)
+    return kind, await reader.readexactly(length)
+
+# --- 服务端 ---
+class SpectatorServer:
+    """asyncio 观战服务: 新客户端收到快照，之后只推送增量"""
+
+    def __init__(self, host=config.SPECTATOR_HOST, port=config.SPECTATOR_PORT):
+        self.host = host
+        self.port = port
+        self.clients = set()
+        self._handlers = set() # 每个客户端连接的处理任务
+        self.last_state = None
+        self.last_snapshot = None
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._last_published = None # 游戏线程最近一次提交的状态
+
+    async def start(self):
+        """在当前事件循环中开始监听 (port 为 0 时使用系统分配的端口)"""
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for writer in list(self.clients):
+            writer.close()
+        self.clients.clear()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def start_in_thread(self):
+        """在后台线程中运行事件循环，供同步的 pygame 主循环使用"""
+        started = threading.Event()
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+                print(f"观战服务已启动: {self.host}:{self.port}")
+            except OSError as e:
+                print(f"观战服务启动失败: {e}")
+                self.loop = None
+                started.set()
+                return
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self._thread = threading.Thread(target=serve, name="spectator", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop_thread(self):
+        if self.loop and self._thread:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=2)
+
+    def publish_threadsafe(self, state):
+        """从游戏线程发布状态 (计算增量与发送都在事件循环线程中进行)，状态未变时不唤醒事件循环"""
+        if self.loop and state != self._last_published:
+            self._last_published = state
+            self.loop.call_soon_threadsafe(self.publish, state)
+
+    def publish(self, state):
+        """发布新状态: 布局变化时广播快照，否则广播增量，无变化时不发送"""
+        previous = self.last_state
+        if previous == state:
+            return
+        self.last_state = state
+        self.last_snapshot = None # 快照惰性生成，只在有新客户端时编码
+        if previous is None or previous.layout != state.layout:
+            message = self._snapshot()
+        else:
+            message = encode_delta(previous, state)
+            if message is None:
+                return
+        self._broadcast(message)
+
+    def _snapshot(self):
+        if self.last_snapshot is None:
+            self.last_snapshot = encode_snapshot(self.last_state)
+        return self.last_snapshot
+
+    def _broadcast(self, message):
+        for writer in list(self.clients):
+            transport = writer.transport
+            if transport.get_write_buffer_size() > config.SPECTATOR_MAX_CLIENT_BUFFER:
+                print("观战客户端发送缓冲区过大，已断开")
+                self.clients.discard(writer)
+                writer.close()
+                continue
+            writer.write(message)
+            self.bytes_sent += len(message)
+            self.messages_sent += 1
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        if self.last_state is not None:
+            message = self._snapshot()
+            writer.write(message)
+            self.bytes_sent += len(message)
+            self.messages_sent += 1
+        self.clients.add(writer)
+        try:
+            # 观战客户端不发送数据，读到 EOF 即表示断开
+            await reader.read()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            self._handlers.discard(task)
+            writer.close()
+
+# --- 参考观战客户端 ---
+class SpectatorClient:
+    """连接观战服务并维护游戏状态的本地镜像"""
+
+    def __init__(self, host=config.SPECTATOR_HOST, port=config.SPECTATOR_PORT):
+        self.host = host
+        self.port = port
+        self.state = None
+        self.bytes_received = 0
+        self.connected = False
+
+    async def run(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.connected = True
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                self.bytes_received += HEADER.size + len(payload)
+                if kind == MSG_SNAPSHOT:
+                    self.state = decode_snapshot(payload)
+                elif kind == MSG_DELTA and self.state is not None:
+                    self.state = apply_delta(self.state, payload)
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            self.connected = False
+            writer.close()
+
+def draw_state(screen, state):
+    """用本地资源缓存把镜像状态绘制出来"""
+    screen.fill(config.BLUE)
+    if state is None:
+        utils.draw_text(screen, "等待游戏数据...", 40, screen.get_width() // 2, screen.get_height() // 2, config.WHITE, center=True)
+        return
+    game_state = GAME_STATES[state.state] if state.state < len(GAME_STATES) else "?"
+    for (x, y, w, h, name, path), bits in zip(state.layout, state.card_bits):
+        if bits & (FACE_UP | MATCHED):
+            image = utils.load_scaled_image(os.path.join(config.IMG_DIR, path), (w, h))
+        else:
+            image = utils.load_scaled_image("card_back.png", (w, h))
+        screen.blit(image, (x, y))
+        if bits & MATCHED:
+            pygame.draw.rect(screen, config.GREEN, (x, y, w, h), 3)
+    level = config.LEVELS[state.level] if state.level < len(config.LEVELS) else None
+    level_name = config.THEME_NAMES.get(level["theme"], level["theme"]) if level else "-"
+    utils.draw_text(screen, f"观战 - 关卡 {state.level + 1}: {level_name} ({game_state})", 30, 45, 10, config.WHITE)
+    utils.draw_text(screen, f"已匹配: {state.matched_pairs}  尝试: {state.attempts}  计时: {state.timer}s", 24, 45, 50, config.WHITE)
+
+async def run_viewer(host, port):
+    """参考观战窗口: 网络读取与绘制在同一个事件循环中交替进行"""
+    pygame.init()
+    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    pygame.display.set_caption("二十四节气记忆匹配 - 观战")
+    client = SpectatorClient(host, port)
+    task = asyncio.create_task(client.run())
+    running = True
+    while running and not task.done():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        draw_state(screen, client.state)
+        pygame.display.flip()
+        await asyncio.sleep(1 / config.FPS)
+    task.cancel()
+    pygame.quit()
+
+# --- 压测 ---
+def _random_states(updates, card_count=12):
+    """生成模拟对局的状态序列: 逐张翻牌、匹配，并推进计时"""
+    layout = tuple((i % 4 * 310, i // 4 * 310, 300, 300, f"节气{i // 2}", f"spring/card{i}.png") for i in range(card_count))
+    bits = bytearray(card_count)
+    states = []
+    attempts = matched = 0
+    for step in range(updates):
+        index = random.randrange(card_count)
+        if bits[index] & MATCHED:
+            bits[index] = 0
+        else:
+            bits[index] ^= FACE_UP
+        if step % 5 == 0:
+            attempts += 1
+        if step % 17 == 0:
+            bits[index] = MATCHED
+            matched = min(card_count // 2, matched + 1)
+        states.append(SpectatorState(1, 0, matched, attempts, 30 - step // 10, layout, bytes(bits)))
+    return states
+
+async def benchmark(client_count=100, updates=300, interval=0.005):
+    """在回环地址上启动服务并连接大量模拟客户端，统计每客户端带宽与分发延迟"""
+    server = SpectatorServer("127.0.0.1", 0)
+    await server.start()
+    states = _random_states(updates)
+    server.publish(states[0]) # 首个状态作为快照
+
+    received = [[] for i in range(client_count)]
+    byte_counts = [0] * client_count
+
+    async def simulated_client(slot):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                received[slot].append(time.perf_counter())
+                byte_counts[slot] += HEADER.size + len(payload)
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    tasks = [asyncio.create_task(simulated_client(i)) for i in range(client_count)]
+    # 等每个客户端都收到连接时的快照后再开始计数，否则快照会被当作第一条增量，延迟错位
+    while len(server.clients) < client_count or not all(received):
+        await asyncio.sleep(0.01)
+    for i in range(client_count):
+        received[i].clear()
+        byte_counts[i] = 0
+
+    publish_times = []
+    for state in states[1:]:
+        before = server.messages_sent
+        published = time.perf_counter()
+        server.publish(state)
+        if server.messages_sent > before:
+            publish_times.append(published)
+        await asyncio.sleep(interval)
+    await asyncio.sleep(0.2)
+    await server.stop()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [(times[i] - sent) * 1000.0 for times in received for i, sent in enumerate(publish_times) if i < len(times)]
+    duration = publish_times[-1] - publish_times[0] if len(publish_times) > 1 else 1.0
+    average_bytes = sum(byte_counts) / client_count
+    print(f"客户端: {client_count}  增量消息: {len(publish_times)}  快照大小: {len(encode_snapshot(states[0]))}B")
+    print(f"每客户端: {average_bytes:.0f}B, 平均 {average_bytes / len(publish_times):.1f}B/消息, {average_bytes / duration / 1024:.2f}KB/s")
+    print(f"分发延迟: p50 {utils.percentile(latencies, 50):.2f}ms  p95 {utils.percentile(latencies, 95):.2f}ms  "
+          f"p99 {utils.percentile(latencies, 99):.2f}ms  max {max(latencies, default=0):.2f}ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="二十四节气记忆匹配 - 观战工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    viewer = sub.add_parser("viewer", help="连接观战服务并显示棋盘")
+    viewer.add_argument("--host", default=config.SPECTATOR_HOST)
+    viewer.add_argument("--port", type=int, default=config.SPECTATOR_PORT)
+    bench = sub.add_parser("bench", help="回环压测")
+    bench.add_argument("--clients", type=int, default=100)
+    bench.add_argument("--updates", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    if args.command == "viewer":
+        asyncio.run(run_viewer(args.host, args.port))
+    else:
+        asyncio.run(benchmark(args.clients, args.updates))
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,88 @@
 import pygame
 import os
+import random
+import time
 import config
 
 # --- 工具函数 ---
+# 每个已加载图片的像素格式选择与测得的 blit 耗时 {路径: {...}}
+# 测量需要额外分配表面并多次 blit，只在 set_image_report(True) 之后记录
+image_report = {}
+image_report_enabled = False
+
+# 共享资源缓存: 多个卡牌/会话共用同一份解码后的图片、字体和声音
+_scaled_image_cache = {} # {(路径, 尺寸): Surface}
+_font_cache = {} # {(字体名, 字号): Font}
+_sound_cache = {} # {文件名: Sound 或 None}
+
+# 文字渲染缓存 (由画质档位开启): {(文本, 字号, 颜色, 字体名): Surface}
+_text_cache = {}
+TEXT_CACHE_LIMIT = 256 # 超出后整体清空，避免不断变化的计时文本无限增长
+text_cache_enabled = False
+
+BLIT_SAMPLES = 3 # 测量 blit 耗时的采样次数
+COLORKEY_CANDIDATE = (255, 0, 255) # 二值透明图片转换为 colorkey 时使用的透明色
+
+def _choose_pixel_format(image):
+    """根据图片实际使用的透明度选择格式: 'opaque'、'colorkey' 或 'alpha'"""
+    if image.get_colorkey() is not None:
+        return "colorkey"
+    if not image.get_flags() & pygame.SRCALPHA:
+        return "opaque"
+    total = image.get_width() * image.get_height()
+    opaque_pixels = pygame.mask.from_surface(image, 254).count() # alpha == 255 的像素数
+    if opaque_pixels == total:
+        return "opaque" # 虽然带 alpha 通道，但完全不透明
+    visible_pixels = pygame.mask.from_surface(image, 0).count() # alpha > 0 的像素数
+    if visible_pixels == opaque_pixels:
+        # 只有全透明/全不透明两种像素，且候选透明色未被使用时可改用 colorkey
+        key_mask = pygame.mask.from_threshold(image, COLORKEY_CANDIDATE + (255,), (1, 1, 1, 255))
+        if key_mask.count() == 0:
+            return "colorkey"
+    return "alpha"
+
+def _convert(image, pixel_format, colorkey=None):
+    """把原始图片只做一次转换，得到与显示器匹配的像素格式"""
+    if pixel_format == "alpha":
+        return image.convert_alpha()
+    if pixel_format == "colorkey":
+        if colorkey is None:
+            colorkey = image.get_colorkey()
+        if colorkey is None:
+            # 二值透明: 把透明像素填成候选透明色后转为不透明格式
+            colorkey = COLORKEY_CANDIDATE
+            transparent = pygame.mask.from_surface(image, 0)
+            transparent.invert()
+            image = image.copy()
+            transparent.to_surface(image, setcolor=colorkey, unsetcolor=None)
+        converted = image.convert()
+        converted.set_colorkey(colorkey, pygame.RLEACCEL)
+        return converted
+    return image.convert()
+
+def _measure_blit(image):
+    """测量图片绘制到显示格式表面上的平均耗时 (毫秒)"""
+    target = pygame.Surface(image.get_size(), 0, pygame.display.get_surface())
+    started = time.perf_counter()
+    for i in range(BLIT_SAMPLES):
+        target.blit(image, (0, 0))
+    return (time.perf_counter() - started) * 1000.0 / BLIT_SAMPLES
+
+def set_image_report(enabled):
+    """开启或关闭图片格式/blit 耗时的记录 (需在加载图片之前开启)"""
+    global image_report_enabled
+    image_report_enabled = enabled
+
+def scale_image(image, size):
+    """缩放图片，保留已转换的像素格式以及 colorkey 的 RLE 加速"""
+    scaled = pygame.transform.scale(image, size)
+    colorkey = image.get_colorkey()
+    if colorkey is not None:
+        scaled.set_colorkey(colorkey, pygame.RLEACCEL)
+    return scaled
+
 def load_image(filepath, size=None, use_colorkey=False, colorkey_color=config.BLACK):
-    """加载图片并可选地调整大小和设置透明色"""
+    """加载图片并可选地调整大小和设置透明色，按实际透明度选择最快的像素格式"""
     try:
         # 优先在 IMG_DIR 中查找相对路径
         if not os.path.isabs(filepath) and not os.path.exists(filepath):
@@ -15,7 +93,7 @@ def load_image(filepath, size=None, use_colorkey=False, colorkey_color=config.BL
         if not os.path.exists(path):
             raise FileNotFoundError(f"图片文件未找到: {path}")
 
-        image = pygame.image.load(path).convert()
+        image = pygame.image.load(path)
     except (pygame.error, FileNotFoundError) as e:
         print(f"无法加载图片: {filepath} - {e}")
         # 创建一个占位符图像
@@ -24,29 +102,172 @@ def load_image(filepath, size=None, use_colorkey=False, colorkey_color=config.BL
         pygame.draw.rect(image, config.RED, image.get_rect(), 2)
         return image # 直接返回占位符
 
-    if size:
-        image = pygame.transform.scale(image, size)
+    return convert_image(image, path, size, use_colorkey, colorkey_color)
+
+def convert_image(image, path, size=None, use_colorkey=False, colorkey_color=config.BLACK):
+    """为已解码的图片选择像素格式并只做一次转换，可选缩放，开启报告时记录最终表面 (需在主线程调用)"""
     if use_colorkey:
-        image.set_colorkey(colorkey_color)
+        pixel_format = "colorkey"
+        image = _convert(image, pixel_format, colorkey_color)
     else:
-        image = image.convert_alpha() # 默认使用 alpha 通道
+        pixel_format = _choose_pixel_format(image)
+        image = _convert(image, pixel_format)
+    if size:
+        image = scale_image(image, size)
+
+    report_image(path, image)
+    return image
+
+def report_image(path, image):
+    """记录实际绘制的表面的像素格式与 blit 耗时 (之后还会被缩放的图片应在缩放后记录)"""
+    if not image_report_enabled:
+        return
+    if image.get_colorkey() is not None:
+        pixel_format = "colorkey"
+    elif image.get_flags() & pygame.SRCALPHA:
+        pixel_format = "alpha"
+    else:
+        pixel_format = "opaque"
+    image_report[path] = {
+        "format": pixel_format,
+        "size": image.get_size(),
+        "blit_ms": _measure_blit(image),
+    }
+
+def load_scaled_image(filepath, size):
+    """加载并缩放图片，按 (路径, 尺寸) 缓存，相同的卡面只解码一次"""
+    key = (filepath, tuple(size))
+    image = _scaled_image_cache.get(key)
+    if image is None:
+        image = load_image(filepath, size) # 报告记录的是实际绘制的缩放后表面
+        _scaled_image_cache[key] = image
     return image
 
+def cached_scaled_image(filepath, size):
+    """返回缓存中已缩放的图片，未缓存时返回 None"""
+    return _scaled_image_cache.get((filepath, tuple(size)))
+
+def cache_scaled_image(filepath, size, image):
+    """把在别处 (如后台解码) 准备好的已缩放图片放入共享缓存"""
+    _scaled_image_cache[(filepath, tuple(size))] = image
+
+def print_image_report():
+    """打印每个已加载图片选择的像素格式及 blit 耗时"""
+    if not image_report:
+        print("尚未记录任何图片 (需在加载前调用 set_image_report(True))。")
+        return
+    print(f"{'格式':<10}{'尺寸':<14}{'blit(ms)':>10}  路径")
+    for path, info in sorted(image_report.items(), key=lambda item: -item[1]["blit_ms"]):
+        size_text = f"{info['size'][0]}x{info['size'][1]}"
+        print(f"{info['format']:<10}{size_text:<14}{info['blit_ms']:>10.3f}  {os.path.relpath(path, config.IMG_DIR)}")
+
+def percentile(values, p):
+    """第 p 百分位数 (取最近秩，不插值)，values 为空时返回 0.0"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+
+def card_layout(grid_rows, grid_cols, width=config.SCREEN_WIDTH, height=config.SCREEN_HEIGHT):
+    """计算卡牌尺寸与网格左上角位置，返回 (card_size, start_x, start_y)"""
+    top_margin = 40 # 顶部留给UI的空间
+    # 可用空间减去所有内边距和外边距
+    available_width = width - (grid_cols + 1) * config.CARD_PADDING
+    available_height = height - top_margin - (grid_rows + 1) * config.CARD_PADDING
+    # 计算理想的卡牌尺寸
+    card_width = available_width // grid_cols
+    card_height = available_height // grid_rows
+    # 取较小值确保卡牌是正方形或适应较窄的维度，并防止变形
+    card_size = (min(card_width, card_height), min(card_width, card_height))
+
+    # 重新计算网格总尺寸和起始位置以居中
+    total_grid_width = grid_cols * card_size[0] + (grid_cols - 1) * config.CARD_PADDING
+    total_grid_height = grid_rows * card_size[1] + (grid_rows - 1) * config.CARD_PADDING
+    start_x = (width - total_grid_width) // 2
+    start_y = top_margin + (available_height - total_grid_height) // 2 # 在可用垂直空间内居中
+    return card_size, start_x, start_y
+
+def pick_card_data(theme, total_pairs):
+    """为主题随机选出 total_pairs 个节气及各自的一张图片，返回 [(节气名, 图片路径)]，出错时返回 None"""
+    theme_img_dir = os.path.join(config.IMG_DIR, theme)
+    available_solar_terms = []
+    try:
+        # 确保主题目录存在
+        if not os.path.isdir(theme_img_dir):
+             raise FileNotFoundError(f"主题图片目录未找到: {theme_img_dir}")
+
+        for item in os.listdir(theme_img_dir):
+            item_path = os.path.join(theme_img_dir, item)
+            # 确保是目录（代表一个节气）
+            if os.path.isdir(item_path):
+                # 检查目录内是否有图片文件
+                has_images = False
+                for f in os.listdir(item_path):
+                    if f.lower().endswith(('.png', '.jpg', '.jpeg')):
+                        has_images = True
+                        break
+                if has_images:
+                    available_solar_terms.append(item) # item 是节气名称 (目录名)
+                else:
+                    print(f"警告: 节气目录 '{item_path}' 为空或不包含图片，已跳过。")
+
+    except FileNotFoundError as e:
+        print(f"错误: {e}")
+        return None
+    except Exception as e:
+        print(f"读取主题 '{theme}' 的子目录时出错: {e}")
+        return None
+
+    # 检查是否有足够的节气用于当前关卡
+    if len(available_solar_terms) < total_pairs:
+        print(f"错误: 主题 '{theme}' 的有效节气目录不足 ({len(available_solar_terms)}个), 需要 {total_pairs} 个。")
+        print(f"请确保在 '{theme_img_dir}' 下有足够的包含图片的节气子目录。")
+        return None
+
+    # 从可用的节气中随机选择所需数量
+    selected_solar_terms = random.sample(available_solar_terms, total_pairs)
+
+    # 为每个选中的节气选择一张图片，并创建卡牌数据对
+    card_data = []
+    for term_name in selected_solar_terms:
+        term_dir = os.path.join(theme_img_dir, term_name)
+        try:
+            images_in_term = [f for f in os.listdir(term_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+            if not images_in_term:
+                # 这个检查理论上在前面已经做过，但为了安全再加一层
+                print(f"错误: 节气目录 '{term_dir}' 中找不到图片文件（这不应该发生）。")
+                return None
+            # 随机选择该节气下的一张图片
+            chosen_image_name = random.choice(images_in_term)
+            # 构造图片的完整路径
+            chosen_image_path = os.path.join(term_dir, chosen_image_name)
+            # 添加节气名和图片路径到列表
+            card_data.append((term_name, chosen_image_path))
+        except Exception as e:
+            print(f"读取节气 '{term_name}' 的图片时出错: {e}")
+            return None
+    return card_data
+
 def load_sound(filename):
-    """加载声音文件"""
+    """加载声音文件 (结果会被缓存，包括加载失败的 None)"""
+    if filename in _sound_cache:
+        return _sound_cache[filename]
     path = os.path.join(config.SND_DIR, filename)
+    sound = None
     if not os.path.exists(path):
         print(f"警告: 声音文件未找到: {path}")
-        return None
-    try:
-        sound = pygame.mixer.Sound(path)
-        return sound
-    except pygame.error as e:
-        print(f"无法加载声音: {path} - {e}")
-        return None
+    else:
+        try:
+            sound = pygame.mixer.Sound(path)
+        except pygame.error as e:
+            print(f"无法加载声音: {path} - {e}")
+    _sound_cache[filename] = sound
+    return sound
 
-def draw_text(surface, text, size, x, y, color=config.BLACK, font_name=config.FONT_NAME, center=False):
-    """在指定位置绘制文本"""
+def get_font(size, font_name=config.FONT_NAME):
+    """获取字体对象，按 (字体名, 字号) 缓存"""
+    key = (font_name, size)
+    font = _font_cache.get(key)
+    if font is not None:
+        return font
     try:
         # 检查字体文件是否存在，如果不存在或不是文件，则使用系统字体
         if font_name and os.path.isfile(font_name):
@@ -57,8 +278,27 @@ def draw_text(surface, text, size, x, y, color=config.BLACK, font_name=config.FO
     except Exception as e:
         print(f"加载字体 '{font_name}' 失败: {e}, 使用默认 'arial'")
         font = pygame.font.SysFont('arial', size) # 最终回退
+    _font_cache[key] = font
+    return font
+
+def set_text_cache(enabled):
+    """开启或关闭文字渲染缓存"""
+    global text_cache_enabled
+    text_cache_enabled = enabled
+    _text_cache.clear()
 
-    text_surface = font.render(text, True, color)
+def draw_text(surface, text, size, x, y, color=config.BLACK, font_name=config.FONT_NAME, center=False):
+    """在指定位置绘制文本"""
+    if text_cache_enabled:
+        key = (text, size, tuple(color), font_name)
+        text_surface = _text_cache.get(key)
+        if text_surface is None:
+            if len(_text_cache) >= TEXT_CACHE_LIMIT:
+                _text_cache.clear()
+            text_surface = get_font(size, font_name).render(text, True, color)
+            _text_cache[key] = text_surface
+    else:
+        text_surface = get_font(size, font_name).render(text, True, color)
     text_rect = text_surface.get_rect()
     if center:
         text_rect.center = (x, y)